@@ -1,57 +1,103 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import os
 import sys
 import asyncio
-import json
+import orjson
+import msgspec
+import base64
+import functools
+import hashlib
+import uuid
+from types import MappingProxyType
 from datetime import datetime, timedelta
 import logging
 from dotenv import load_dotenv
+from cachetools import TTLCache
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Total trip budget used for each budget tier offered by the frontend
+BUDGET_TABLE = {
+    "Budget": 8000,      # Budget (Under ₹10,000): use lower end
+    "Moderate": 18000,   # Moderate (₹10,000 - ₹25,000): use middle range
+    "Luxury": 40000,     # Luxury (₹25,000 - ₹50,000): use upper-middle
+    "Premium": 75000,    # Premium (Above ₹50,000): use higher amount
+}
+DEFAULT_TOTAL_BUDGET = 15000  # Fallback for unrecognised budget strings
+
+# Budget breakdown percentages (typical travel spending)
+_BREAKDOWN_PCT = (
+    ("accommodation", 35),
+    ("food", 25),
+    ("transport", 20),
+    ("activities", 15),
+    ("shopping", 5),
+)
+
 # Budget parsing function
-def parse_budget(budget_string: str, duration: int) -> dict:
+@functools.lru_cache(maxsize=256)
+def parse_budget(budget_string: str, duration: int) -> MappingProxyType:
     """
     Parse budget string and calculate detailed budget breakdown.
     
+    Results are memoized, so the returned mapping is a read-only view shared
+    between callers.
+    
     Args:
         budget_string: Budget string from frontend (e.g., "Luxury (₹25,000 - ₹50,000)")
         duration: Trip duration in days
         
     Returns:
-        dict: Budget breakdown with total, daily, and category amounts
+        MappingProxyType: Budget breakdown with total, daily, and category amounts
     """
-    # Extract budget range from string
-    if "Budget (Under ₹10,000)" in budget_string:
-        total_budget = 8000  # Use lower end for budget
-    elif "Moderate (₹10,000 - ₹25,000)" in budget_string:
-        total_budget = 18000  # Use middle range for moderate
-    elif "Luxury (₹25,000 - ₹50,000)" in budget_string:
-        total_budget = 40000  # Use upper-middle for luxury
-    elif "Premium (Above ₹50,000)" in budget_string:
-        total_budget = 75000  # Use higher amount for premium
-    else:
-        total_budget = 15000  # Default fallback
+    # Look up the tier from the leading word of the budget string
+    tier = budget_string.split(" ", 1)[0]
+    total_budget = BUDGET_TABLE.get(tier, DEFAULT_TOTAL_BUDGET)
     
     # Calculate daily budget
     daily_budget = total_budget // duration if duration > 0 else total_budget
     
-    # Budget breakdown percentages (typical travel spending)
-    breakdown = {
-        'total_budget': total_budget,
-        'daily_budget': daily_budget,
-        'accommodation': int(total_budget * 0.35),  # 35% for accommodation
-        'food': int(total_budget * 0.25),          # 25% for food
-        'transport': int(total_budget * 0.20),     # 20% for transport
-        'activities': int(total_budget * 0.15),    # 15% for activities
-        'shopping': int(total_budget * 0.05)       # 5% for shopping
-    }
+    breakdown = {'total_budget': total_budget, 'daily_budget': daily_budget}
+    breakdown.update((category, total_budget * pct // 100) for category, pct in _BREAKDOWN_PCT)
     
-    return breakdown
+    return MappingProxyType(breakdown)
+
+# Returned when no task produced an itinerary
+ITINERARY_UNAVAILABLE = 'Unable to generate itinerary'
+
+# Prompt context shared by every travel task
+CONTEXT_TEMPLATE = (
+    "Travel Request Details:\n"
+    "Origin: {origin}\n"
+    "Destination: {destination}\n"
+    "Duration: {duration} days\n"
+    "Budget Level: {budget}\n"
+    "Total Budget: ₹{total_budget:,}\n"
+    "Daily Budget: ₹{daily_budget:,}\n"
+    "Budget Breakdown: Accommodation ₹{accommodation:,}, Food ₹{food:,}, Transport ₹{transport:,}, Activities ₹{activities:,}\n"
+    "Travel Style: {travel_style}\n"
+    "Preferences/Interests: {interests}\n"
+    "Special Requirements: {special_requirements}\n"
+)
+
+# Appended to the context of tasks in TASKS_NEEDS_BUDGET
+BUDGET_ADDENDUM_TEMPLATE = (
+    "\n\nBUDGET DETAILS FOR THIS TASK:\n"
+    "Budget Level: {budget}\n"
+    "Total Budget: ₹{total_budget:,}\n"
+    "Daily Budget: ₹{daily_budget:,}\n"
+    "Accommodation Budget: ₹{accommodation:,}\n"
+    "Food Budget: ₹{food:,}\n"
+    "Transport Budget: ₹{transport:,}\n"
+    "Activities Budget: ₹{activities:,}\n"
+)
 
 # Add the current directory to path to import travel module
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -60,12 +106,34 @@ try:
     from travel import (
         destination_research_task, accommodation_task, transportation_task,
         activities_task, dining_task, itinerary_task, chatbot_task,
-        run_task
+        run_task, run_task_stream
     )
     TRAVEL_MODULE_AVAILABLE = True
+    
+    # Travel planning tasks paired with their result keys, in run order
+    TASKS = tuple(
+        (task, task.description[:30])
+        for task in (
+            destination_research_task,
+            accommodation_task,
+            transportation_task,
+            activities_task,
+            dining_task,
+            itinerary_task
+        )
+    )
+    # Result key of the task whose output is the final itinerary
+    ITINERARY_KEY = dict(TASKS)[itinerary_task]
+    # Tasks that get the per-category budget block appended to their context
+    TASKS_NEEDS_BUDGET = tuple(
+        task for task, _ in TASKS if hasattr(task, 'description') and 'budget' in task.description
+    )
 except ImportError:
     TRAVEL_MODULE_AVAILABLE = False
-    print("Travel module not available")
+    TASKS = ()
+    ITINERARY_KEY = None
+    TASKS_NEEDS_BUDGET = ()
+    logger.warning("Travel module not available")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -74,13 +142,49 @@ app = FastAPI(
     version="1.0.0"
 )
 
+class UnhandledErrorMiddleware:
+    """
+    Plain ASGI middleware that turns unexpected errors into a JSON 500;
+    HTTPExceptions keep FastAPI's own handler.
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def send_wrapper(message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            # Too late for a 500 once headers are out; let the server close the connection
+            if response_started:
+                raise
+            logger.exception("Unhandled error processing %s", scope["path"])
+            response = ORJSONResponse({"detail": f"Error: {str(exc)}"}, status_code=500)
+            await response(scope, receive, send)
+
+# Added before CORSMiddleware so it runs inside it and the 500 keeps the
+# CORS headers (an exception_handler(Exception) would run outside CORS)
+app.add_middleware(UnhandledErrorMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:3001", "http://localhost:3002"],
+    allow_origins=("http://localhost:3000", "http://localhost:3001", "http://localhost:3002"),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=("X-Budget", "X-Map-Url"),
 )
 
 # Pydantic models
@@ -117,150 +221,260 @@ class HealthResponse(BaseModel):
     uptime: float
     environment: str
 
+# msgspec structs used on the response path; the Pydantic response models
+# above only document the schema for OpenAPI
+class TravelResponseStruct(msgspec.Struct):
+    itinerary: str
+    mapUrl: Optional[str] = None
+    budget: Optional[dict] = None
+
+class ChatbotResponseStruct(msgspec.Struct):
+    response: str
+    history: List[Dict[str, str]]
+
+_ENCODER = msgspec.json.Encoder()
+
+class MsgspecJSONResponse(Response):
+    """JSON response encoded with a shared msgspec encoder."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return _ENCODER.encode(content)
+
+# Health fields that never change after startup
+_HEALTH_STATIC = {
+    "status": "healthy",
+    "travel_module": TRAVEL_MODULE_AVAILABLE,
+    "chatbot_module": TRAVEL_MODULE_AVAILABLE,
+    "version": "1.0.0",
+    "uptime": 0.0,  # This would be calculated in a real app
+    "environment": "development"
+}
+
 # Health check endpoint
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health", response_class=ORJSONResponse, responses={200: {"model": HealthResponse}})
 async def health_check():
-    return HealthResponse(
-        status="healthy",
-        timestamp=datetime.now().isoformat(),
-        travel_module=TRAVEL_MODULE_AVAILABLE,
-        chatbot_module=TRAVEL_MODULE_AVAILABLE,
-        version="1.0.0",
-        uptime=0.0,  # This would be calculated in a real app
-        environment="development"
+    return ORJSONResponse({**_HEALTH_STATIC, "timestamp": datetime.utcnow().isoformat()})
+
+# Generated travel plans, keyed by travel_plan_cache_key()
+_TRAVEL_PLAN_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+
+def travel_plan_cache_key(request: TravelRequest) -> str:
+    """
+    Build a stable cache key for a travel request.
+    
+    Interests are sorted so that the same set in a different order maps to
+    the same key.
+    """
+    fields = request.model_dump()
+    fields["interests"] = sorted(fields["interests"])
+    return hashlib.blake2b(orjson.dumps(fields, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+def build_task_contexts(request: TravelRequest, budget_info) -> tuple:
+    """
+    Build the prompt contexts for a travel request.
+    
+    Returns:
+        tuple: (input_context, budget_context), where budget_context adds the
+            per-category budget block for tasks in TASKS_NEEDS_BUDGET
+    """
+    fmt_dict = {
+        **budget_info,
+        "origin": request.origin,
+        "destination": request.destination,
+        "duration": request.duration,
+        "budget": request.budget,
+        "travel_style": request.travelStyle,
+        "interests": ', '.join(request.interests),
+        "special_requirements": request.specialRequirements
+    }
+    input_context = CONTEXT_TEMPLATE.format_map(fmt_dict)
+    budget_context = input_context + BUDGET_ADDENDUM_TEMPLATE.format_map(fmt_dict)
+    return input_context, budget_context
+
+def build_prompt_fields(request: TravelRequest) -> dict:
+    """Values for the {destination}-style placeholders in the task prompts."""
+    return {
+        "origin": request.origin,
+        "destination": request.destination,
+        "duration": request.duration,
+        "budget": request.budget,
+        "preferences": ', '.join(request.interests)
+    }
+
+def build_map_url(request: TravelRequest) -> str:
+    """Serialize the map data the frontend uses to draw directions."""
+    map_data = {
+        "origin": request.origin,
+        "destination": request.destination,
+        "type": "directions"
+    }
+    return orjson.dumps(map_data).decode()
+
+# Shared travel planning pipeline
+async def build_travel_plan(request: TravelRequest) -> TravelResponseStruct:
+    """
+    Run all travel planning tasks for a request and assemble the response payload.
+    
+    Args:
+        request: Validated travel request from the frontend
+        
+    Returns:
+        TravelResponseStruct: Payload with itinerary, mapUrl, and budget
+    """
+    # Identical requests share one generated plan; interest order is irrelevant
+    cache_key = travel_plan_cache_key(request)
+    cached = _TRAVEL_PLAN_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Parse and calculate budget amounts
+    budget_info = parse_budget(request.budget, request.duration)
+    
+    input_context, budget_context = build_task_contexts(request, budget_info)
+    prompt_fields = build_prompt_fields(request)
+    
+    results = {}
+    # Each task is a blocking Gemini round-trip and none of them consumes
+    # another's output, so fan them all out concurrently
+    outcomes = await asyncio.gather(
+        *(
+            asyncio.to_thread(
+                run_task,
+                task,
+                budget_context if task in TASKS_NEEDS_BUDGET else input_context,
+                user_input=prompt_fields
+            )
+            for task, _ in TASKS
+        ),
+        return_exceptions=True
     )
+    for (_, key), result in zip(TASKS, outcomes):
+        if isinstance(result, Exception):
+            logger.error("Error in %s: %s", key, result)
+            results[key] = f"Error: {str(result)}"
+        else:
+            results[key] = result
+            logger.debug("Task completed: %s", key)
+    
+    # Generate final itinerary
+    itinerary = results.get(ITINERARY_KEY, ITINERARY_UNAVAILABLE)
+    
+    payload = TravelResponseStruct(
+        itinerary=itinerary,
+        mapUrl=build_map_url(request),
+        budget=dict(budget_info)
+    )
+    
+    # run_task reports failures as "⚠️ ..." messages rather than raising,
+    # so only cache plans where every task produced real output
+    if not any(isinstance(result, Exception) or result.startswith("⚠️") for result in outcomes):
+        _TRAVEL_PLAN_CACHE[cache_key] = payload
+    return payload
 
 # Travel planning endpoint
-@app.post("/travel/plan", response_model=TravelResponse)
+@app.post("/travel/plan", response_class=MsgspecJSONResponse, responses={200: {"model": TravelResponse}})
 async def plan_travel(request: TravelRequest):
     if not TRAVEL_MODULE_AVAILABLE:
         raise HTTPException(status_code=500, detail="Travel module not available")
     
-    try:
-        # Create travel context
-        travel_context = {
-            "origin": request.origin,
-            "destination": request.destination,
-            "start_date": request.startDate,
-            "end_date": request.endDate,
-            "duration": request.duration,
-            "budget": request.budget,
-            "travel_style": request.travelStyle,
-            "interests": request.interests,
-            "special_requirements": request.specialRequirements or ""
-        }
-        
-        # Parse and calculate budget amounts
-        budget_info = parse_budget(request.budget, request.duration)
-        
-        # Create input context string with detailed budget information
-        input_context = (
-            f"Travel Request Details:\n"
-            f"Origin: {request.origin}\n"
-            f"Destination: {request.destination}\n"
-            f"Duration: {request.duration} days\n"
-            f"Budget Level: {request.budget}\n"
-            f"Total Budget: ₹{budget_info['total_budget']:,}\n"
-            f"Daily Budget: ₹{budget_info['daily_budget']:,}\n"
-            f"Budget Breakdown: Accommodation ₹{budget_info['accommodation']:,}, Food ₹{budget_info['food']:,}, Transport ₹{budget_info['transport']:,}, Activities ₹{budget_info['activities']:,}\n"
-            f"Travel Style: {request.travelStyle}\n"
-            f"Preferences/Interests: {', '.join(request.interests)}\n"
-            f"Special Requirements: {request.specialRequirements}\n"
-        )
-        
-        # Run travel planning tasks
-        tasks = [
-            destination_research_task,
-            accommodation_task,
-            transportation_task,
-            activities_task,
-            dining_task,
-            itinerary_task
-        ]
-        
-        results = {}
-        api_key = os.getenv("GEMINI_API_KEY")
-        for task in tasks:
-            try:
-                # Create enhanced context with budget information for each task
-                enhanced_context = input_context
-                if hasattr(task, 'description') and 'budget' in task.description:
-                    enhanced_context += f"\n\nBUDGET DETAILS FOR THIS TASK:\n"
-                    enhanced_context += f"Budget Level: {request.budget}\n"
-                    enhanced_context += f"Total Budget: ₹{budget_info['total_budget']:,}\n"
-                    enhanced_context += f"Daily Budget: ₹{budget_info['daily_budget']:,}\n"
-                    enhanced_context += f"Accommodation Budget: ₹{budget_info['accommodation']:,}\n"
-                    enhanced_context += f"Food Budget: ₹{budget_info['food']:,}\n"
-                    enhanced_context += f"Transport Budget: ₹{budget_info['transport']:,}\n"
-                    enhanced_context += f"Activities Budget: ₹{budget_info['activities']:,}\n"
-                
-                result = run_task(task, enhanced_context, api_key)
-                key = task.description[:30]
-                results[key] = result
-                print(f"Task completed: {key}")
-            except Exception as e:
-                key = task.description[:30]
-                print(f"Error in {key}: {e}")
-                results[key] = f"Error: {str(e)}"
-        
-        # Generate final itinerary
-        itinerary = results.get('Create a day-by-day itinerary', 'Unable to generate itinerary')
-        if itinerary == 'Unable to generate itinerary':
-            # Try alternative key
-            itinerary = results.get('Create a day-by-day itinerary', 'Unable to generate itinerary')
-            # If still not found, get the last result (itinerary task should be last)
-            if itinerary == 'Unable to generate itinerary' and results:
-                itinerary = list(results.values())[-1]
-        
-        # Generate map data for frontend to handle
-        map_data = {
-            "origin": request.origin,
-            "destination": request.destination,
-            "type": "directions"
-        }
-        
-        return TravelResponse(
-            itinerary=itinerary,
-            mapUrl=json.dumps(map_data),
-            budget=budget_info
+    # The payload is built from known-good values, so skip the
+    # response_model re-validation and encode it straight to JSON
+    return MsgspecJSONResponse(await build_travel_plan(request))
+
+# Streaming travel planning endpoint. The itinerary task does not depend on
+# the other tasks' output, so its text is streamed as Gemini generates it;
+# budget and map data travel in base64-encoded JSON headers.
+@app.post("/travel/plan/stream", response_class=StreamingResponse)
+async def stream_travel_plan(request: TravelRequest):
+    if not TRAVEL_MODULE_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Travel module not available")
+    
+    budget_info = parse_budget(request.budget, request.duration)
+    headers = {
+        "X-Budget": base64.b64encode(orjson.dumps(dict(budget_info))).decode(),
+        "X-Map-Url": base64.b64encode(build_map_url(request).encode()).decode()
+    }
+    
+    cached = _TRAVEL_PLAN_CACHE.get(travel_plan_cache_key(request))
+    if cached is not None:
+        chunks = iter((cached.itinerary,))
+    else:
+        input_context, budget_context = build_task_contexts(request, budget_info)
+        chunks = run_task_stream(
+            itinerary_task,
+            budget_context if itinerary_task in TASKS_NEEDS_BUDGET else input_context,
+            user_input=build_prompt_fields(request)
         )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error planning travel: {str(e)}")
+    return StreamingResponse(chunks, media_type="text/plain", headers=headers)
+
+# Background travel planning jobs, keyed by job id. Jobs live in the worker
+# process that accepted them, so polling must reach the same worker. The server
+# therefore defaults to one worker; only raise WEB_CONCURRENCY behind sticky
+# sessions.
+MAX_PLAN_JOBS = 256
+_PLAN_JOBS: Dict[str, asyncio.Task] = {}
+
+@app.post("/travel/plan/jobs", status_code=202, response_class=MsgspecJSONResponse)
+async def submit_travel_plan(request: TravelRequest):
+    if not TRAVEL_MODULE_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Travel module not available")
+    
+    # Drop the oldest finished jobs once the registry is full
+    for job_id in [job_id for job_id, job in _PLAN_JOBS.items() if job.done()]:
+        if len(_PLAN_JOBS) < MAX_PLAN_JOBS:
+            break
+        del _PLAN_JOBS[job_id]
+    if len(_PLAN_JOBS) >= MAX_PLAN_JOBS:
+        raise HTTPException(status_code=503, detail="Too many travel plans in progress")
+    
+    job_id = uuid.uuid4().hex
+    _PLAN_JOBS[job_id] = asyncio.create_task(build_travel_plan(request))
+    return MsgspecJSONResponse({"job_id": job_id, "status": "pending"}, status_code=202)
+
+@app.get("/travel/plan/jobs/{job_id}", response_class=MsgspecJSONResponse)
+async def get_travel_plan(job_id: str):
+    job = _PLAN_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown travel plan job")
+    if not job.done():
+        return MsgspecJSONResponse({"job_id": job_id, "status": "pending"}, status_code=202)
+    
+    error = job.exception()
+    if error is not None:
+        raise HTTPException(status_code=500, detail=f"Error planning travel: {str(error)}")
+    return MsgspecJSONResponse({"job_id": job_id, "status": "completed", "result": job.result()})
 
 # Chatbot endpoint
-@app.post("/chatbot/ask", response_model=ChatbotResponse)
+@app.post("/chatbot/ask", response_class=MsgspecJSONResponse, responses={200: {"model": ChatbotResponse}})
 async def ask_chatbot(request: ChatbotRequest):
     if not TRAVEL_MODULE_AVAILABLE:
         raise HTTPException(status_code=500, detail="Chatbot module not available")
     
-    try:
-        # Create chat context
-        chat_context = {
-            "message": request.message,
-            "history": request.history or []
-        }
-        
-        # Run chatbot task
-        api_key = os.getenv("GEMINI_API_KEY")
-        response = run_task(chatbot_task, request.message, api_key)
-        
-        # Update history
-        new_history = request.history.copy() if request.history else []
-        new_history.append({"role": "user", "content": request.message})
-        new_history.append({"role": "assistant", "content": response})
-        
-        return ChatbotResponse(
-            response=response,
-            history=new_history
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing chatbot request: {str(e)}")
+    # Run chatbot task
+    response = run_task(chatbot_task, request.message)
+    
+    # Update history
+    user_msg = {"role": "user", "content": request.message}
+    assistant_msg = {"role": "assistant", "content": response}
+    new_history = (request.history or []) + [user_msg, assistant_msg]
+    
+    return MsgspecJSONResponse(ChatbotResponseStruct(response=response, history=new_history))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers need the app as an import string; uvloop and httptools ship
+    # with uvicorn[standard]. One worker by default, since background plan
+    # jobs are kept in process memory (see _PLAN_JOBS)
+    uvicorn.run(
+        "main:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1"))
+    )
 
 
 
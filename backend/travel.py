@@ -16,38 +16,81 @@
 # 5. Dining Agent - Recommends dining experiences showcasing local cuisine
 # 6. Itinerary Agent - Compiles all recommendations into a cohesive day-by-day plan
 # 7. Chatbot Agent - Provides conversational responses to travel queries
+# 8. Travel Research Coordinator - Answers agents 1-5 in a single combined call
 #
 # Each agent is powered by Google's Generative AI (Gemini) and is specialized through
 # careful system prompting that defines its role, goals, and expected outputs.
 #
 # WORKFLOW:
 # 1. User submits travel preferences
-# 2. Each agent processes the information in sequence
+# 2. The research agents process the information concurrently
 # 3. Final itinerary is compiled from all agent outputs
 # 4. Results are presented to the user as a complete travel plan
 #
 # PRIMARY FUNCTIONS:
 # - run_task(): Core function to execute a specific agent task
+# - run_task_stream(): Streaming variant of run_task that yields response chunks
+# - run_task_async(): Async variant of run_task for concurrent execution
+# - run_task_astream(): Async streaming variant used for the final itinerary
+# - run_fused_research_async(): Runs all five research tasks as one LLM call (opt-in)
 # - generate_travel_itinerary(): Orchestrates the full planning process
+# - generate_travel_itinerary_batch(): Generates itineraries for many requests concurrently
 # - save_itinerary_to_file(): Saves the generated itinerary for the user
 #
 # Created by TechMatrix Solvers for IIITDMJ HackByte3.0
 """
 
 import os
+import re
 import json
+import asyncio
+import functools
+import hashlib
 import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
 from datetime import datetime, timedelta
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import SystemMessage, HumanMessage
 from dotenv import load_dotenv
 
+# orjson is faster than the standard json module; fall back to json when it
+# isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Setup logging configuration
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# -------------------------------------------------------------------------------
+# JSON Helpers
+# -------------------------------------------------------------------------------
+def _json_dumps_sorted(obj) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes with sorted keys, for stable hashing."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True).encode("utf-8")
+
+def _json_dumps_pretty(obj) -> str:
+    """Serialize obj to indented, human-readable JSON text."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+def _json_loads(text: str):
+    """Parse JSON text; raises ValueError if it is malformed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
 # -------------------------------------------------------------------------------
 # Agent and Task Classes with Type Hints and Docstrings
 # -------------------------------------------------------------------------------
@@ -63,6 +106,9 @@ class Agent:
         self.tools = []  # Initialize with empty list for future tool integrations
         self.llm = llm
 
+# Matches {field} placeholders in task prompts, e.g. {destination}
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
 class Task:
     def __init__(self, description: str, agent: Agent, expected_output: str, context=None) -> None:
         """
@@ -72,30 +118,79 @@ class Task:
         self.agent = agent
         self.expected_output = expected_output
         self.context = context or []
+        # The agent definition and expected output don't change after
+        # construction, so build the system prompt once
+        self._system_prompt = f"""
+    # Role: {agent.role}
+    # Goal: {agent.goal}
+    # Backstory: {agent.backstory}
+    
+    Instructions for output:
+    {expected_output}
+    """
+        # Static prefix shared by every call for this task. Keeping it first and
+        # byte-identical lets Gemini's prefix caching reuse it across requests;
+        # placeholder values and the user request after it are what vary.
+        self._prompt_prefix = f"{self._system_prompt}\n\n"
+        # Placeholders are found once here; render() then only looks up their
+        # values, and remembers recent results per combination of fields
+        self._placeholders = tuple(sorted(set(_PLACEHOLDER_PATTERN.findall(self._prompt_prefix))))
+        self._render_cached = functools.lru_cache(maxsize=128)(self._render)
+
+    def _render(self, fields: tuple) -> str:
+        """
+        Build the section that gives the placeholder values from (name, value) pairs.
+        """
+        if not fields:
+            return ""
+        lines = "".join(f"{{{name}}} = {value}\n" for name, value in fields)
+        return f"Placeholder values used in the instructions above:\n{lines}\n"
+
+    def render(self, user_input: dict) -> str:
+        """
+        Return the values of the {destination}, {preferences} and similar
+        placeholders in this task's prompt, taken from user_input, as a section
+        that follows the static prompt prefix. Empty if none apply.
+        """
+        fields = tuple(
+            (name, str(user_input[name])) for name in self._placeholders if name in user_input
+        )
+        return self._render_cached(fields)
 
 # -------------------------------------------------------------------------------
 # Initialize LLM
 # -------------------------------------------------------------------------------
-def initialize_llm(api_key=None):
-    """Initialize the LLM with the provided API key or from environment variables.
-    
-    Args:
-        api_key (str, optional): API key for Google Generative AI. 
-            If None, will try to get from environment variables.
-            
-    Returns:
-        ChatGoogleGenerativeAI or None: Initialized LLM instance or None if initialization failed.
+# Every agent's LLM calls go through google-generativeai's process-wide client
+# (gRPC by default). Building a new LLM re-runs genai.configure(), which
+# replaces that client, so LLMs are only built once per API key (see _build_llm).
+
+class _SecretKey:
     """
-    # First try the provided API key
-    if api_key:
-        google_api_key = api_key
-    else:
-        # Fall back to environment variable
-        google_api_key = os.getenv("GEMINI_API_KEY")
-    
-    if not google_api_key:
-        logging.warning("GEMINI_API_KEY is not set. AI functionality will be limited.")
-        return None
+    API key wrapper that hashes and compares by SHA-256 digest, so the raw key
+    is never used as a cache key or shown in a repr.
+    """
+    __slots__ = ("value", "digest")
+
+    def __init__(self, value: str) -> None:
+        self.value = value
+        self.digest = hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _SecretKey) and self.digest == other.digest
+
+    def __repr__(self) -> str:
+        return f"_SecretKey(sha256={self.digest[:12]}...)"
+
+@functools.lru_cache(maxsize=8)
+def _build_llm(secret: _SecretKey):
+    """
+    Validate an API key and build its LLM. Results, including None for a key
+    that failed, are memoized per key.
+    """
+    google_api_key = secret.value
     
     # Basic API key format validation
     if not google_api_key.startswith("AI"):
@@ -125,6 +220,32 @@ def initialize_llm(api_key=None):
             logging.error("Request timed out: Network issue or service unavailability.")
         return None
 
+def initialize_llm(api_key=None):
+    """Initialize the LLM with the provided API key or from environment variables.
+    
+    Args:
+        api_key (str, optional): API key for Google Generative AI. 
+            If None, will try to get from environment variables.
+            
+    Instances are memoized per API key, so repeated calls with the same key
+    return the same client; a key that failed to initialize keeps returning None.
+    
+    Returns:
+        ChatGoogleGenerativeAI or None: Initialized LLM instance or None if initialization failed.
+    """
+    # First try the provided API key
+    if api_key:
+        google_api_key = api_key
+    else:
+        # Fall back to environment variable
+        google_api_key = os.getenv("GEMINI_API_KEY")
+    
+    if not google_api_key:
+        logging.warning("GEMINI_API_KEY is not set. AI functionality will be limited.")
+        return None
+    
+    return _build_llm(_SecretKey(google_api_key))
+
 # Initialize with environment variable for now
 llm = initialize_llm()
 
@@ -346,184 +467,503 @@ The itinerary should:
 Format should be scannable with clear headings, timing, and logistical details for easy reference during travel."""
 )
 
+# -------------------------------------------------------------------------------
+# Define Combined Research Task
+# -------------------------------------------------------------------------------
+# The five research tasks share the same input, so they can be answered in one
+# LLM call that returns every section as a field of a JSON object. The
+# individual tasks above remain available for granular use.
+FUSED_RESEARCH_SECTIONS = (
+    ("destination_research", destination_research_task),
+    ("accommodation", accommodation_task),
+    ("transportation", transportation_task),
+    ("activities", activities_task),
+    ("dining", dining_task),
+)
+
+travel_research_agent = Agent(
+    role="Travel Research Coordinator",
+    goal="Produce destination, accommodation, transportation, activities and dining research for a trip in India in a single structured response.",
+    backstory="A senior travel consultant who combines the expertise of destination researchers, hospitality experts, logistics specialists, activity curators and culinary guides.",
+    personality="Thorough, structured, and knowledgeable about Indian travel.",
+    llm=llm,
+)
+
+travel_research_task = Task(
+    description="Research {destination} for a trip from {origin}, covering the destination, accommodations, transportation, activities and dining in one structured response.",
+    agent=travel_research_agent,
+    expected_output=(
+        "Respond with only a JSON object (no code fences or surrounding text) with exactly these keys, "
+        "each holding a Markdown-formatted string:\n\n"
+        + "\n\n".join(f'"{key}": {task.expected_output}' for key, task in FUSED_RESEARCH_SECTIONS)
+    )
+)
+
+# -------------------------------------------------------------------------------
+# Response Cache Keyed on the Prompt and Model Settings
+# -------------------------------------------------------------------------------
+RESPONSE_CACHE_SIZE = 512
+_RESPONSE_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+def _normalize_input(input_text: str) -> str:
+    """
+    Normalize user input so equivalent requests share a cache entry.
+    """
+    return unicodedata.normalize("NFC", input_text).strip()
+
+def _response_cache_key(task: Task, prompt: str) -> str:
+    """
+    Hash everything that shapes an LLM response for a task: the model settings
+    and the full prompt. The API key is deliberately left out.
+    """
+    llm = task.agent.llm
+    key = {
+        "model": getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+        "top_p": getattr(llm, "top_p", None),
+        "top_k": getattr(llm, "top_k", None),
+        "prompt": prompt,
+    }
+    return hashlib.sha256(_json_dumps_sorted(key)).hexdigest()
+
+def _get_cached_response(key: str):
+    """Return the cached response for key, or None on a miss."""
+    with _RESPONSE_CACHE_LOCK:
+        response = _RESPONSE_CACHE.get(key)
+        if response is not None:
+            _RESPONSE_CACHE.move_to_end(key)
+        return response
+
+def _cache_response(key: str, response: str) -> None:
+    """Store a successful response, evicting the least recently used entry."""
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = response
+        _RESPONSE_CACHE.move_to_end(key)
+        if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
+def _discard_cached_response(key: str) -> None:
+    """Drop a cached response that turned out to be unusable."""
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE.pop(key, None)
+
 # -------------------------------------------------------------------------------
 # Helper Function to Run a Task with Full Agent & Task Information
 # -------------------------------------------------------------------------------
-def run_task(task: Task, input_text: str, api_key=None) -> str:
+API_KEY_ERROR_MESSAGE = "⚠️ API Key Error: Please enter a valid Gemini API key in the settings to access AI features."
+
+def _get_task_llm(task: Task, api_key=None):
+    """
+    Return the LLM to use for a task. Agents share the module-level LLM; an
+    explicit API key swaps in the memoized client for that key.
+    """
+    if api_key:
+        current_llm = initialize_llm(api_key)
+        if current_llm and current_llm is not task.agent.llm:
+            # Update the agent's LLM
+            task.agent.llm = current_llm
+    return task.agent.llm
+
+def _build_prompt(task: Task, input_text: str, user_input: dict = None) -> str:
+    """
+    Build the full prompt for a task from its precomputed system prompt and the user input.
+    When user_input is given, the values of the prompt's placeholders are added from it.
+    """
+    # Combine system prompt with user input since Gemini doesn't support
+    # SystemMessage; dynamic content always goes after the static prefix
+    placeholder_values = task.render(user_input) if user_input else ""
+    return f"{task._prompt_prefix}{placeholder_values}User Request: {input_text}"
+
+# User-friendly messages for common LLM errors, checked in order
+_ERROR_TABLE = (
+    (re.compile(r"timeout", re.IGNORECASE), "⚠️ Request timed out. The service might be experiencing high traffic. Please try again later."),
+    (re.compile(r"429"), "⚠️ Rate limit exceeded. Please try again in a few minutes."),
+    (re.compile(r"403|401|authentication", re.IGNORECASE), "⚠️ API Key Error: Your API key appears to be invalid or has expired. Please update it in settings."),
+    (re.compile(r"quota", re.IGNORECASE), "⚠️ API quota exceeded. Your Gemini API key has reached its usage limit."),
+)
+GENERIC_ERROR_MESSAGE = "⚠️ Error processing your request. Please try again or check your API key settings."
+
+def _error_message(error_msg: str) -> str:
+    """
+    Map an LLM error message to a user-friendly message.
+    """
+    for pattern, message in _ERROR_TABLE:
+        if pattern.search(error_msg):
+            return message
+    # Generic error message for other types of errors
+    return GENERIC_ERROR_MESSAGE
+
+def _log_task_time(task: Task, start_ns: int) -> None:
+    """Log how long a task's LLM call took, given its perf_counter_ns() start."""
+    # Skip the formatting entirely when INFO logging is off
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        response_time = (time.perf_counter_ns() - start_ns) / 1e9
+        logging.info("Task '%s...' completed in %.2f seconds", task.description[:30], response_time)
+
+def _prepare_task_call(task: Task, input_text: str, api_key, bypass_cache: bool, user_input: dict):
+    """
+    Shared preamble of the run_task variants: check the LLM, build the prompt
+    and look up the response cache.
+    
+    Returns:
+        tuple: (early_response, combined_prompt, cache_key). early_response is
+            the API key error or a cached response, in which case the LLM must
+            not be called; otherwise it is None.
+    """
+    if not _get_task_llm(task, api_key):
+        logging.error("No valid API key provided")
+        return API_KEY_ERROR_MESSAGE, "", ""
+    
+    combined_prompt = _build_prompt(task, _normalize_input(input_text), user_input)
+    cache_key = _response_cache_key(task, combined_prompt)
+    if not bypass_cache:
+        cached = _get_cached_response(cache_key)
+        if cached is not None:
+            return cached, combined_prompt, cache_key
+    return None, combined_prompt, cache_key
+
+def _task_error_message(e: Exception, action: str) -> str:
+    """Log a failed LLM call and return the user-friendly error message."""
+    error_msg = str(e)
+    logging.error(f"Error {action} task: {error_msg}")
+    return _error_message(error_msg)
+
+def run_task(task: Task, input_text: str, api_key=None, bypass_cache: bool = False, user_input: dict = None) -> str:
     """
     Run an agent task with the given input text and API key.
     
     Args:
         task: The Task to run
         input_text: User input text
-        api_key: Optional Gemini API key to use
+        api_key: Optional Gemini API key to use. When omitted, the agent's
+            module-level LLM is reused instead of building a new client.
+        bypass_cache: Skip the response cache lookup and force a fresh call
+        user_input: Optional trip details used to fill in the task's prompt placeholders
         
     Returns:
         str: The generated response or error message
     """
-    # Check if we need to initialize or reinitialize the LLM
-    current_llm = initialize_llm(api_key)
-    if current_llm:
-        # Update the agent's LLM
-        task.agent.llm = current_llm
-    elif not task.agent.llm:
-        logging.error("No valid API key provided")
-        return "⚠️ API Key Error: Please enter a valid Gemini API key in the settings to access AI features."
-    
-    # Prepare the system prompt
-    system_prompt = f"""
-    # Role: {task.agent.role}
-    # Goal: {task.agent.goal}
-    # Backstory: {task.agent.backstory}
-    
-    Instructions for output:
-    {task.expected_output}
-    """
-    
-    # Combine system prompt with user input since Gemini doesn't support SystemMessage
-    combined_prompt = f"{system_prompt}\n\nUser Request: {input_text}"
-    
-    messages = [
-        HumanMessage(content=combined_prompt)
-    ]
+    early_response, combined_prompt, cache_key = _prepare_task_call(task, input_text, api_key, bypass_cache, user_input)
+    if early_response is not None:
+        return early_response
     
     try:
         # Start tracking time for possible timeout issues
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         # Make the API call with timeout handling
-        response = task.agent.llm.invoke(messages).content
+        response = task.agent.llm.invoke(combined_prompt).content
         
         # Calculate response time for logging
-        response_time = (datetime.now() - start_time).total_seconds()
-        logging.info(f"Task '{task.description[:30]}...' completed in {response_time:.2f} seconds")
+        _log_task_time(task, start_ns)
         
+        _cache_response(cache_key, response)
         return response
     except Exception as e:
-        error_msg = str(e)
-        logging.error(f"Error running task: {error_msg}")
-        
         # Create user-friendly error messages based on the exception
-        if "timeout" in error_msg.lower():
-            return "⚠️ Request timed out. The service might be experiencing high traffic. Please try again later."
-        elif "429" in error_msg:
-            return "⚠️ Rate limit exceeded. Please try again in a few minutes."
-        elif "403" in error_msg or "401" in error_msg or "authentication" in error_msg.lower():
-            return "⚠️ API Key Error: Your API key appears to be invalid or has expired. Please update it in settings."
-        elif "quota" in error_msg.lower():
-            return "⚠️ API quota exceeded. Your Gemini API key has reached its usage limit."
-        else:
-            # Generic error message for other types of errors
-            return f"⚠️ Error processing your request. Please try again or check your API key settings."
+        return _task_error_message(e, "running")
+
+async def run_task_async(task: Task, input_text: str, api_key=None, bypass_cache: bool = False, user_input: dict = None) -> str:
+    """
+    Async variant of run_task that awaits the LLM's ainvoke API, so several
+    tasks can share one event loop. Takes the same arguments as run_task.
+    """
+    early_response, combined_prompt, cache_key = _prepare_task_call(task, input_text, api_key, bypass_cache, user_input)
+    if early_response is not None:
+        return early_response
+    
+    try:
+        start_ns = time.perf_counter_ns()
+        response = (await task.agent.llm.ainvoke(combined_prompt)).content
+        _log_task_time(task, start_ns)
+        
+        _cache_response(cache_key, response)
+        return response
+    except Exception as e:
+        return _task_error_message(e, "running")
+
+def run_task_stream(task: Task, input_text: str, api_key=None, bypass_cache: bool = False, user_input: dict = None) -> Iterator[str]:
+    """
+    Run an agent task and yield the response text as Gemini streams it. Takes
+    the same arguments as run_task.
+    
+    Yields:
+        str: Chunks of the generated response, or a single error message
+    """
+    early_response, combined_prompt, cache_key = _prepare_task_call(task, input_text, api_key, bypass_cache, user_input)
+    if early_response is not None:
+        yield early_response
+        return
+    
+    try:
+        chunks = []
+        for chunk in task.agent.llm.stream(combined_prompt):
+            chunks.append(chunk.content)
+            yield chunk.content
+        _cache_response(cache_key, "".join(chunks))
+    except Exception as e:
+        yield _task_error_message(e, "streaming")
+
+async def run_task_astream(task: Task, input_text: str, api_key=None, bypass_cache: bool = False, user_input: dict = None) -> AsyncIterator[str]:
+    """
+    Async variant of run_task_stream using the LLM's astream API. Takes the
+    same arguments as run_task.
+    
+    Yields:
+        str: Chunks of the generated response, or a single error message
+    """
+    early_response, combined_prompt, cache_key = _prepare_task_call(task, input_text, api_key, bypass_cache, user_input)
+    if early_response is not None:
+        yield early_response
+        return
+    
+    try:
+        chunks = []
+        async for chunk in task.agent.llm.astream(combined_prompt):
+            chunks.append(chunk.content)
+            yield chunk.content
+        _cache_response(cache_key, "".join(chunks))
+    except Exception as e:
+        yield _task_error_message(e, "streaming")
+
+def _parse_fused_research(response: str) -> Optional[Dict[str, str]]:
+    """
+    Parse the combined research response into one string per research section.
+    
+    Returns:
+        dict or None: Section text keyed as in FUSED_RESEARCH_SECTIONS, or None
+            if the response is not a JSON object with every section
+    """
+    text = response.strip()
+    if text.startswith("```"):
+        # Drop a Markdown code fence around the JSON
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    try:
+        data = _json_loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    
+    sections = {}
+    for key, _ in FUSED_RESEARCH_SECTIONS:
+        value = data.get(key)
+        if value is None:
+            return None
+        sections[key] = value if isinstance(value, str) else _json_dumps_pretty(value)
+    return sections
+
+async def run_fused_research_async(input_text: str, api_key=None, user_input: dict = None) -> Union[Dict[str, str], str, None]:
+    """
+    Run all five research tasks as a single LLM call.
+    
+    Args:
+        input_text: User input text
+        api_key: Optional Gemini API key to use (see run_task)
+        user_input: Optional trip details used to fill in the prompt placeholders
+        
+    Returns:
+        dict, str or None: Section text keyed as in FUSED_RESEARCH_SECTIONS; the
+            "⚠️ ..." message if the LLM call itself failed; or None if a reply
+            came back but could not be parsed
+    """
+    response = await run_task_async(travel_research_task, input_text, api_key, user_input=user_input)
+    # Failures such as rate limits are reported as-is; retrying them as five
+    # separate calls would only add load to an API that just refused us
+    if response.startswith("⚠️"):
+        return response
+    sections = _parse_fused_research(response)
+    if sections is None:
+        logging.warning("Combined research response could not be parsed; falling back to individual tasks")
+        # Don't let identical requests keep hitting the same unparseable reply
+        prompt = _build_prompt(travel_research_task, _normalize_input(input_text), user_input)
+        _discard_cached_response(_response_cache_key(travel_research_task, prompt))
+    return sections
 
 # -------------------------------------------------------------------------------
 # User Input Functions
 # -------------------------------------------------------------------------------
-def get_user_input() -> dict:
+@dataclass(slots=True, frozen=True)
+class TripRequest:
+    """
+    A traveler's request for an itinerary. Field names match the placeholders
+    used in the task prompts.
+    """
+    origin: str
+    destination: str
+    duration: int
+    start_date: str
+    end_date: str
+    preferences: str
+    budget: str
+    special_requirements: str = ""
+
+def get_user_input() -> TripRequest:
     """
     Collects user input for travel itinerary generation.
     """
     print("\n=== Travel Itinerary Generator ===\n")
     origin = input("Enter your origin: ")
     destination = input("Enter your destination: ")
-    duration = input("Enter duration in days: ")
+    duration = int(input("Enter duration in days: "))
     
     current_date = datetime.now()
     start_date = current_date + timedelta(days=7)
-    end_date = start_date + timedelta(days=int(duration))
+    end_date = start_date + timedelta(days=duration)
     
     preferences = input("Enter your preferences (comma separated): ")
     budget = input("Enter your budget: ")
     
-    return {
-        "origin": origin,
-        "destination": destination,
-        "duration": duration,
-        "start_date": start_date.strftime("%Y-%m-%d"),
-        "end_date": end_date.strftime("%Y-%m-%d"),
-        "preferences": preferences,
-        "budget": budget
-    }
+    return TripRequest(
+        origin=origin,
+        destination=destination,
+        duration=duration,
+        start_date=start_date.strftime("%Y-%m-%d"),
+        end_date=end_date.strftime("%Y-%m-%d"),
+        preferences=preferences,
+        budget=budget
+    )
 
 # -------------------------------------------------------------------------------
 # Main Function to Generate Travel Itinerary
 # -------------------------------------------------------------------------------
-def generate_travel_itinerary(user_input: dict) -> str:
+async def generate_travel_itinerary_async(user_input: TripRequest, verbose: bool = True, fused: bool = False) -> str:
     """
-    Generates a personalized travel itinerary by sequentially running defined tasks.
-    """
-    print("\nGenerating your personalized travel itinerary...\n")
-    
-    # Create input context using f-string formatting
-    input_context = (
-        f"Travel Request Details:\n"
-        f"Origin: {user_input['origin']}\n"
-        f"Destination: {user_input['destination']}\n"
-        f"Duration: {user_input['duration']} days\n"
-        f"Budget Level: {user_input['budget']}\n"
-        f"Preferences/Interests: {user_input['preferences']}\n"
-        f"Special Requirements: {user_input['special_requirements']}\n"
-    )
-    
-    # Step 1: Destination Research
-    print("Researching your destination...")
-    destination_info = run_task(destination_research_task, input_context)
-    print("✓ Destination research completed")
-    
-    # Step 2: Accommodation Recommendations
-    print("Finding ideal accommodations...")
-    accommodation_info = run_task(accommodation_task, input_context)
-    print("✓ Accommodation recommendations completed")
+    Generates a personalized travel itinerary. The five research tasks run
+    concurrently, and the itinerary task then combines their results.
     
-    # Step 3: Transportation Planning
-    print("Planning transportation...")
-    transportation_info = run_task(transportation_task, input_context)
-    print("✓ Transportation planning completed")
+    With fused=True the research is instead requested as a single combined LLM
+    call, falling back to the individual tasks if its reply can't be parsed.
+    This is opt-in: all five sections must fit in one reply's output budget,
+    and a truncated reply costs an extra round trip.
     
-    # Step 4: Activities & Attractions
-    print("Curating activities and attractions...")
-    activities_info = run_task(activities_task, input_context)
-    print("✓ Activities and attractions curated")
-    
-    # Step 5: Dining Recommendations
-    print("Finding dining experiences...")
-    dining_info = run_task(dining_task, input_context)
-    print("✓ Dining recommendations completed")
+    Progress and the streamed itinerary are printed unless verbose is False.
+    """
+    echo = print if verbose else (lambda *args, **kwargs: None)
+    echo("\nGenerating your personalized travel itinerary...\n")
+    
+    # Create input context by joining the request lines
+    input_context = "\n".join([
+        "Travel Request Details:",
+        f"Origin: {user_input.origin}",
+        f"Destination: {user_input.destination}",
+        f"Duration: {user_input.duration} days",
+        f"Budget Level: {user_input.budget}",
+        f"Preferences/Interests: {user_input.preferences}",
+        f"Special Requirements: {user_input.special_requirements}",
+        ""
+    ])
+    # Values for the {destination}-style placeholders in the task prompts
+    prompt_fields = asdict(user_input)
+    
+    # Steps 1-5: Destination research, accommodation, transportation,
+    # activities and dining recommendations
+    echo("Researching your destination, accommodations, transportation, activities and dining...")
+    sections = await run_fused_research_async(input_context, user_input=prompt_fields) if fused else None
+    if isinstance(sections, str):
+        echo(sections)
+        return sections
+    if sections is not None:
+        research = tuple(sections[key] for key, _ in FUSED_RESEARCH_SECTIONS)
+    else:
+        research = await asyncio.gather(
+            *(run_task_async(task, input_context, user_input=prompt_fields) for _, task in FUSED_RESEARCH_SECTIONS)
+        )
+    (
+        destination_info,
+        accommodation_info,
+        transportation_info,
+        activities_info,
+        dining_info
+    ) = research
+    echo("✓ Destination research completed")
+    echo("✓ Accommodation recommendations completed")
+    echo("✓ Transportation planning completed")
+    echo("✓ Activities and attractions curated")
+    echo("✓ Dining recommendations completed")
     
     # Step 6: Create Day-by-Day Itinerary
-    print("Creating your day-by-day itinerary...")
-    combined_info = (
-        input_context + "\n"
-        "Destination Information:\n" + destination_info + "\n"
-        "Accommodation Options:\n" + accommodation_info + "\n"
-        "Transportation Plan:\n" + transportation_info + "\n"
-        "Recommended Activities:\n" + activities_info + "\n"
-        "Dining Recommendations:\n" + dining_info + "\n"
-    )
-    itinerary = run_task(itinerary_task, combined_info)
-    print("✓ Itinerary creation completed")
-    print("✓ Itinerary generation completed")
+    echo("Creating your day-by-day itinerary...")
+    combined_info = "".join([
+        input_context, "\n",
+        "Destination Information:\n", destination_info, "\n",
+        "Accommodation Options:\n", accommodation_info, "\n",
+        "Transportation Plan:\n", transportation_info, "\n",
+        "Recommended Activities:\n", activities_info, "\n",
+        "Dining Recommendations:\n", dining_info, "\n"
+    ])
+    # Stream the itinerary so it appears as it is generated
+    itinerary_parts = []
+    async for chunk in run_task_astream(itinerary_task, combined_info, user_input=prompt_fields):
+        itinerary_parts.append(chunk)
+        echo(chunk, end="", flush=True)
+    echo()
+    itinerary = "".join(itinerary_parts)
+    echo("✓ Itinerary creation completed")
+    echo("✓ Itinerary generation completed")
     
     return itinerary
 
+def generate_travel_itinerary(user_input: TripRequest) -> str:
+    """
+    Synchronous wrapper around generate_travel_itinerary_async.
+    """
+    return asyncio.run(generate_travel_itinerary_async(user_input))
+
+async def generate_travel_itinerary_batch(
+    user_inputs: List[TripRequest],
+    max_concurrency: int = 10,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> List[str]:
+    """
+    Generates itineraries for several travel requests concurrently.
+    
+    Args:
+        user_inputs: Travel requests, as returned by get_user_input()
+        max_concurrency: Maximum number of itineraries generated at once
+        progress_callback: Optional callable invoked as (completed, total)
+            after each itinerary finishes
+            
+    Returns:
+        List[str]: Itineraries in the same order as user_inputs
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    total = len(user_inputs)
+    completed = 0
+    
+    async def run_one(user_input: TripRequest) -> str:
+        nonlocal completed
+        async with semaphore:
+            itinerary = await generate_travel_itinerary_async(user_input, verbose=False)
+        completed += 1
+        if progress_callback:
+            progress_callback(completed, total)
+        return itinerary
+    
+    return list(await asyncio.gather(*(run_one(user_input) for user_input in user_inputs)))
+
 # -------------------------------------------------------------------------------
 # Save Itinerary to File
 # -------------------------------------------------------------------------------
-def save_itinerary_to_file(itinerary: str, user_input: dict, output_dir: str = None) -> str:
+ITINERARY_FILENAME_TEMPLATE = "India_Travel_Itinerary_{destination}_{timestamp}.txt"
+
+def save_itinerary_to_file(itinerary: str, user_input: TripRequest, output_dir: str = None) -> str:
     """
     Saves the generated itinerary to a text file and returns the filepath.
     """
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    filename = f"India_Travel_Itinerary_{user_input['destination']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    filename = ITINERARY_FILENAME_TEMPLATE.format_map({
+        "destination": user_input.destination,
+        "timestamp": datetime.now().strftime('%Y%m%d_%H%M%S')
+    })
     
     if output_dir:
-        if not os.path.exists(output_dir):
-            try:
-                os.makedirs(output_dir)
-                logging.info(f"Created output directory: {output_dir}")
-            except Exception as e:
-                logging.error(f"Error creating directory {output_dir}: {e}")
-                return ""
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+        except Exception as e:
+            logging.error(f"Error creating directory {output_dir}: {e}")
+            return ""
         filepath = os.path.join(output_dir, filename)
     else:
         filepath = filename
@@ -550,12 +990,11 @@ def main() -> None:
     print("\nGenerating your personalized travel itinerary...\n")
     itinerary = generate_travel_itinerary(user_input)
     
+    # The itinerary text was already streamed to the console while generating
     print("\n" + "=" * 50)
     print("Your travel itinerary is ready!")
     print("=" * 50 + "\n")
     
-    print(itinerary)
-    
     output_file = save_itinerary_to_file(itinerary, user_input)
     print(f"\nYour itinerary has been saved to: {output_file}")
 
@@ -4,7 +4,7 @@ echo "🚀 Starting AgentX Travel India Setup..."
 
 # Check if Python is installed
 if ! command -v python3 &> /dev/null; then
-    echo "❌ Python 3 is not installed. Please install Python 3.8+ first."
+    echo "❌ Python 3 is not installed. Please install Python 3.10+ first."
     exit 1
 fi
 